@@ -0,0 +1,96 @@
+import os
+import random
+
+# Synthetic fixtures for the offline benchmarks (no network access, no real data)
+
+WORDS = [
+    "amyloid", "beta", "fibril", "aggregation", "oligomer", "tau", "protein", "misfolding",
+    "neuron", "plaque", "alzheimer", "disease", "cerebral", "angiopathy", "transthyretin",
+    "light", "chain", "cardiac", "deposition", "clearance", "microglia", "inflammation",
+    "peptide", "structure", "cryo", "electron", "microscopy", "kinetics", "inhibitor",
+    "antibody", "therapy", "patients", "cohort", "biomarker", "imaging", "pet", "tracer",
+    "mouse", "model", "cells", "expression", "pathway", "synaptic", "toxicity", "membrane",
+]
+
+SECTION_LABELS = ["BACKGROUND:", "METHODS:", "RESULTS:", "CONCLUSIONS:"]
+
+# Function to generate a random sentence-like text of n_words words
+def random_text(rng, n_words):
+    return " ".join(rng.choice(WORDS) for _ in range(n_words))
+
+# Function to generate random abstract texts of min_words..max_words words
+def random_abstracts(n, min_words=150, max_words=400, seed=42):
+    rng = random.Random(seed)
+    return [random_text(rng, rng.randint(min_words, max_words)) for _ in range(n)]
+
+# Function to generate a fake efetch XML payload with n_articles PubmedArticle entries
+def fake_efetch_xml(n_articles, seed=42):
+    rng = random.Random(seed)
+    articles = []
+    for i in range(n_articles):
+        authors = "".join(
+            f"<Author><LastName>{rng.choice(WORDS).title()}</LastName><ForeName>{rng.choice(WORDS).title()}</ForeName></Author>"
+            for _ in range(rng.randint(1, 8))
+        )
+        sections = "".join(
+            f'<AbstractText Label="{label[:-1]}">{label} {random_text(rng, rng.randint(30, 80))}</AbstractText>'
+            for label in SECTION_LABELS
+        )
+        articles.append(
+            "<PubmedArticle><MedlineCitation>"
+            f"<PMID>{10000000 + i}</PMID>"
+            "<Article>"
+            f"<Journal><JournalIssue><PubDate><Year>{rng.randint(1970, 2025)}</Year></PubDate></JournalIssue>"
+            f"<Title>Journal of {rng.choice(WORDS).title()}</Title></Journal>"
+            f"<ArticleTitle>{random_text(rng, 12)}</ArticleTitle>"
+            f"<Abstract>{sections}</Abstract>"
+            f"<AuthorList>{authors}</AuthorList>"
+            "</Article>"
+            "</MedlineCitation></PubmedArticle>"
+        )
+    return f'<?xml version="1.0" ?><PubmedArticleSet>{"".join(articles)}</PubmedArticleSet>'
+
+# Function to generate random affiliation strings mixing countries, aliases, US institutions and states
+def random_affiliations(n, countries, aliases, institutions, states, seed=42):
+    rng = random.Random(seed)
+    affiliations = []
+    for _ in range(n):
+        department = f"Department of {rng.choice(WORDS).title()}"
+        kind = rng.random()
+        if kind < 0.05:
+            affiliations.append("No Affiliation")
+        elif kind < 0.55:
+            affiliations.append(f"{department}, University of {rng.choice(WORDS).title()}, {rng.choice(countries)}.")
+        elif kind < 0.7:
+            affiliations.append(f"{department}, {rng.choice(WORDS).title()} Institute, {rng.choice(list(aliases))}.")
+        elif kind < 0.85:
+            affiliations.append(f"{department}, {rng.choice(institutions)}.")
+        elif kind < 0.95:
+            affiliations.append(f"{department}, {rng.choice(WORDS).title()} Hospital, Springfield, {rng.choice(states)} 12345.")
+        else:
+            affiliations.append(f"{department}, {rng.choice(WORDS).title()} Center.")
+    return affiliations
+
+# Function to save a tiny randomly initialized BERT model and tokenizer to a directory
+def save_tiny_bert(directory, seed=42):
+    import torch
+    from transformers import BertConfig, BertModel, BertTokenizer
+
+    os.makedirs(directory, exist_ok=True)
+    vocab = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"] + sorted(set(WORDS))
+    vocab_file = os.path.join(directory, "vocab.txt")
+    with open(vocab_file, "w") as f:
+        f.write("\n".join(vocab) + "\n")
+
+    torch.manual_seed(seed)
+    config = BertConfig(
+        vocab_size=len(vocab),
+        hidden_size=32,
+        num_hidden_layers=2,
+        num_attention_heads=2,
+        intermediate_size=64,
+        max_position_embeddings=512,
+    )
+    BertModel(config).save_pretrained(directory)
+    BertTokenizer(vocab_file, do_lower_case=True).save_pretrained(directory)
+    return directory
@@ -0,0 +1,104 @@
+import argparse
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import instrumentation
+from instrumentation import stage
+import fixtures
+
+# Benchmark: parse (and clean) fake efetch XML
+def bench_parse(scale):
+    from PMID_PubMed import parse_abstracts, forbidden_words
+
+    # parse_abstracts records the "parse" and "clean" stages itself
+    xml_data = fixtures.fake_efetch_xml(50 * scale)
+    parse_abstracts(xml_data, forbidden_words)
+
+# Benchmark: country normalization on random affiliations
+def bench_normalize(scale):
+    from Affiliation_Country import normalize_country, countries, country_aliases, us_institutions, us_states
+
+    affiliations = fixtures.random_affiliations(2000 * scale, countries, country_aliases, us_institutions, us_states)
+    with stage("normalize", items=len(affiliations)):
+        for affiliation in affiliations:
+            normalize_country(affiliation)
+
+# Benchmark: tokenize and embed with a tiny randomly initialized BERT, in both embedding modes
+def bench_embed(scale):
+    import amyloidBERT
+
+    with tempfile.TemporaryDirectory() as directory:
+        amyloidBERT.load_model(fixtures.save_tiny_bert(directory))
+        abstracts = fixtures.random_abstracts(20 * scale, min_words=100, max_words=1200)
+
+        with stage("embed_truncate") as run:
+            count = 0
+            for tokenized_batch in amyloidBERT.tokenize_abstracts(abstracts, batch_size=16):
+                count += amyloidBERT.generate_embeddings(tokenized_batch, pooling="cls").shape[0]
+            run["items"] = count
+
+        with stage("embed_sliding") as run:
+            count = 0
+            for tokenized_batch in amyloidBERT.tokenize_sliding_windows(abstracts, batch_size=16):
+                embeddings = amyloidBERT.generate_embeddings(tokenized_batch, pooling="mean")
+                count += amyloidBERT.pool_documents(embeddings, tokenized_batch, pooling="weighted_mean").shape[0]
+            run["items"] = count
+
+# Benchmark: LDA fit on random abstracts and the vectorized topic summary
+def bench_lda(scale):
+    from sklearn.feature_extraction.text import CountVectorizer
+    from sklearn.decomposition import LatentDirichletAllocation as LDA
+    from topic_summary import summarize_topics
+
+    abstracts = fixtures.random_abstracts(200 * scale)
+    vectorizer = CountVectorizer()
+    with stage("vectorize", items=len(abstracts)):
+        X = vectorizer.fit_transform(abstracts)
+
+    lda_model = LDA(n_components=5, random_state=42)
+    with stage("lda_fit", items=X.shape[0]):
+        lda_model.fit(X)
+    with stage("lda_transform", items=X.shape[0]):
+        lda_model.transform(X)
+
+    # Topic summary on a 100k-term vocabulary
+    rng = np.random.RandomState(42)
+    components = rng.gamma(1.0, size=(50, 100000))
+    feature_names = np.array([f"term{i}" for i in range(components.shape[1])])
+    with stage("topic_summary", items=components.shape[0]):
+        summarize_topics(components, feature_names, np.full(50, 1 / 50), 50)
+
+BENCHMARKS = {
+    "parse": bench_parse,
+    "normalize": bench_normalize,
+    "embed": bench_embed,
+    "lda": bench_lda,
+}
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the offline benchmarks on synthetic fixtures.")
+    parser.add_argument("benchmarks", nargs="*", help=f"Benchmarks to run (default: all of {', '.join(BENCHMARKS)}).")
+    parser.add_argument("--scale", type=int, default=1, help="Multiplier for the fixture sizes.")
+    parser.add_argument("--output", default="benchmark_reports", help="Directory for the JSON/CSV report.")
+    args = parser.parse_args()
+
+    unknown = set(args.benchmarks) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"Unknown benchmarks: {', '.join(sorted(unknown))}")
+
+    for name in args.benchmarks or BENCHMARKS:
+        print(f"Running benchmark: {name}")
+        BENCHMARKS[name](args.scale)
+
+    # Write the report here instead of at exit
+    instrumentation.PROFILE_ENABLED = False
+    instrumentation.write_report(args.output, "benchmarks")
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
 import pandas as pd
 import re
 import plotly.express as px
+from instrumentation import stage
 
 # List of countries and abbreviation mappings
 countries = [
@@ -124,26 +125,31 @@ def normalize_country(affiliation):
     # Default to Unknown
     return "Unknown"
 
-# Read the CSV
-df = pd.read_csv("metadata.csv")
+def main():
+    # Read the CSV
+    df = pd.read_csv("metadata.csv")
 
-# Remove rows that contain only "No Affiliation"
-df = df[~df['Affiliations'].str.fullmatch(r'(No Affiliation;?\s?)+')].copy()
+    # Remove rows that contain only "No Affiliation"
+    df = df[~df['Affiliations'].str.fullmatch(r'(No Affiliation;?\s?)+')].copy()
 
-# Add the "Country" column applying normalization
-df['Country'] = df['Affiliations'].apply(normalize_country)
+    # Add the "Country" column applying normalization
+    with stage("normalize", items=len(df)):
+        df['Country'] = df['Affiliations'].apply(normalize_country)
 
-# Count the frequency of each country
-country_counts = df['Country'].value_counts().reset_index()
-country_counts.columns = ['Country', 'Count']
+    # Count the frequency of each country
+    country_counts = df['Country'].value_counts().reset_index()
+    country_counts.columns = ['Country', 'Count']
 
-# Save the result to a CSV file
-country_counts.to_csv("country_frequency.csv", index=False)
+    # Save the result to a CSV file
+    country_counts.to_csv("country_frequency.csv", index=False)
 
-# Create the world map with country frequencies
-fig = px.choropleth(country_counts, locations="Country", locationmode="country names",
-                    color="Count", hover_name="Country", title="Country Frequency Map")
-fig.update_layout(showlegend=False)
-fig.show()
+    # Create the world map with country frequencies
+    fig = px.choropleth(country_counts, locations="Country", locationmode="country names",
+                        color="Count", hover_name="Country", title="Country Frequency Map")
+    fig.update_layout(showlegend=False)
+    fig.show()
 
-print("Processing complete!")
+    print("Processing complete!")
+
+if __name__ == "__main__":
+    main()
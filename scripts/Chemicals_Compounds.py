@@ -7,6 +7,7 @@ import pubchempy as pcp
 from chemdataextractor import Document
 from tqdm import tqdm
 import logging
+from instrumentation import stage, cache_lookup
 
 # Logging configuration
 logging.basicConfig(
@@ -30,6 +31,7 @@ def save_cache():
 
 # Function to retrieve PubChem information
 def get_pubchem_info(compound_name):
+    cache_lookup("pubchem", compound_name in api_cache)
     if compound_name in api_cache:
         return api_cache[compound_name]
     
@@ -89,7 +91,8 @@ if "Abstract" not in df.columns:
 
 # Apply the extraction function with a progress bar
 tqdm.pandas()
-df["Extracted Compounds"] = df["Abstract"].progress_apply(lambda x: extract_compounds([x]))
+with stage("ner", items=len(df)):
+    df["Extracted Compounds"] = df["Abstract"].progress_apply(lambda x: extract_compounds([x]))
 
 # Prepare a DataFrame for compounds
 compounds_data = []
@@ -0,0 +1,201 @@
+import csv
+import hashlib
+import re
+import zlib
+import numpy as np
+
+# Input and output files
+input_path = "abstracts.txt"
+output_path = "unique_abstracts.txt"
+report_path = "duplicate_clusters.csv"
+
+# MinHash / LSH configuration
+SHINGLE_SIZE = 5  # Words per shingle
+NUM_PERM = 64  # MinHash permutations (signature length)
+BANDS = 16  # LSH bands; NUM_PERM must be divisible by BANDS (16 x 4 puts the S-curve midpoint near 0.5)
+JACCARD_THRESHOLD = 0.8  # Minimum estimated Jaccard similarity to flag a near-duplicate
+
+ROWS = NUM_PERM // BANDS
+MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+MAX_HASH = np.uint64((1 << 32) - 1)
+
+# Random hash family (a * x + b) mod p, shared by every record
+rng = np.random.RandomState(42)
+perm_a = rng.randint(1, 1 << 32, size=NUM_PERM, dtype=np.uint64)
+perm_b = rng.randint(0, 1 << 32, size=NUM_PERM, dtype=np.uint64)
+
+# Function to stream records from the abstracts file without loading it whole
+def iter_records(file_path):
+    record = []
+    with open(file_path, 'r') as f:
+        for line in f:
+            if line.startswith('Abstract #') and record:
+                yield ''.join(record)
+                record = []
+            if line.startswith('Abstract #') or record:
+                record.append(line)
+    if record:
+        yield ''.join(record)
+
+# Function to extract the PMID and the text used for comparison
+def record_key(record):
+    fields = {}
+    for line in record.splitlines():
+        key, sep, value = line.partition(': ')
+        if sep:
+            fields.setdefault(key, value)
+    pmid = record.split('\n', 1)[0][len('Abstract #'):].strip()
+    text = f"{fields.get('Title', '')} {fields.get('Abstract', '')}"
+    return pmid, text
+
+# Function to normalize text before hashing
+def normalize(text):
+    return re.sub(r'[^a-z0-9]+', ' ', text.lower()).strip()
+
+# Function to compute the MinHash signature of a tokenized text (at least SHINGLE_SIZE words)
+def minhash(words):
+    shingles = {' '.join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+    hashes = np.fromiter((zlib.crc32(s.encode()) for s in shingles), dtype=np.uint64, count=len(shingles))
+    permuted = (np.outer(perm_a, hashes) + perm_b[:, None]) % MERSENNE_PRIME & MAX_HASH
+    return permuted.min(axis=1).astype(np.uint32)
+
+# Map from uint64 keys to int rows: sorted numpy arrays plus a dict of recent inserts, merged in batches
+# (about 12 bytes per key once merged, instead of a Python object per key)
+class IntIndex:
+    def __init__(self, min_buffer=65536):
+        self.keys = np.empty(0, dtype=np.uint64)
+        self.rows = np.empty(0, dtype=np.int32)
+        self.recent = {}
+        self.min_buffer = min_buffer
+
+    # Function to look up an array of keys; missing keys map to -1
+    def get(self, keys):
+        rows = np.full(len(keys), -1, dtype=np.int64)
+        if self.keys.size:
+            positions = np.minimum(np.searchsorted(self.keys, keys), self.keys.size - 1)
+            found = self.keys[positions] == keys
+            rows[found] = self.rows[positions[found]]
+        if self.recent:
+            for i in np.flatnonzero(rows < 0):
+                rows[i] = self.recent.get(int(keys[i]), -1)
+        return rows
+
+    # Function to add keys that are not in the index yet
+    def add(self, keys, row):
+        for key in keys:
+            self.recent.setdefault(int(key), row)
+        # The buffer grows with the index so merges stay amortized linear
+        if len(self.recent) >= max(self.min_buffer, self.keys.size // 8):
+            new_keys = np.fromiter(self.recent.keys(), dtype=np.uint64, count=len(self.recent))
+            new_rows = np.fromiter(self.recent.values(), dtype=np.int32, count=len(self.recent))
+            order = np.argsort(new_keys)
+            positions = np.searchsorted(self.keys, new_keys[order])
+            self.keys = np.insert(self.keys, positions, new_keys[order])
+            self.rows = np.insert(self.rows, positions, new_rows[order])
+            self.recent = {}
+
+# Random multipliers and per-band offsets folding each band of ROWS values into one uint64 key;
+# key collisions only add candidates, which are verified on the full signature
+band_coefficients = rng.randint(1, 1 << 63, size=(BANDS, ROWS), dtype=np.uint64) | np.uint64(1)
+band_offsets = rng.randint(0, 1 << 63, size=BANDS, dtype=np.uint64)
+
+# Function to compute the LSH band keys of a signature
+def band_keys(signature):
+    return (signature.reshape(BANDS, ROWS).astype(np.uint64) * band_coefficients).sum(axis=1) + band_offsets
+
+# Exact-duplicate index: first 8 bytes of the SHA-1 digest -> representative row
+exact_index = IntIndex()
+
+# LSH index: band key -> representative row (all bands share one index, the offsets keep them apart)
+band_index = IntIndex()
+
+# Representative store: PMID (-1 if not numeric) and MinHash signature per row
+# (rows of records too short to shingle keep an unused signature)
+representative_pmids = np.empty(1024, dtype=np.int64)
+signatures = np.empty((1024, NUM_PERM), dtype=np.uint32)
+representatives = 0
+
+# Function to store a new representative and return its row
+def add_representative(pmid, signature=None):
+    global representative_pmids, signatures, representatives
+    row = representatives
+    if row == representative_pmids.shape[0]:
+        representative_pmids = np.resize(representative_pmids, 2 * row)
+        signatures = np.resize(signatures, (2 * row, NUM_PERM))
+    representative_pmids[row] = int(pmid) if pmid.isdigit() else -1
+    if signature is not None:
+        signatures[row] = signature
+    representatives += 1
+    return row
+
+# Function to format a representative PMID for the report
+def representative_pmid(row):
+    pmid = representative_pmids[row]
+    return str(pmid) if pmid >= 0 else 'Unknown PMID'
+
+total = unique = exact_duplicates = near_duplicates = 0
+
+with open(output_path, 'w') as out, open(report_path, 'w', newline='') as report_file:
+    report = csv.writer(report_file)
+    report.writerow(['Representative_PMID', 'Duplicate_PMID', 'Match_Type', 'Estimated_Jaccard'])
+
+    for record in iter_records(input_path):
+        total += 1
+        if total % 100000 == 0:
+            print(f"Processed {total} records ({unique} unique so far).")
+
+        pmid, text = record_key(record)
+        normalized = normalize(text)
+        words = normalized.split()
+
+        # Records without any title or abstract carry no content to compare
+        if normalized in ('', 'no title no abstract'):
+            out.write(record)
+            unique += 1
+            continue
+
+        # Exact duplicates
+        digest = np.array([int.from_bytes(hashlib.sha1(normalized.encode()).digest()[:8], 'little')], dtype=np.uint64)
+        exact_row = exact_index.get(digest)[0]
+        if exact_row >= 0:
+            report.writerow([representative_pmid(exact_row), pmid, 'exact', 1.0])
+            exact_duplicates += 1
+            continue
+
+        # Records too short to shingle are only deduplicated exactly
+        if len(words) < SHINGLE_SIZE:
+            exact_index.add(digest, add_representative(pmid))
+            out.write(record)
+            unique += 1
+            continue
+
+        # Near duplicates: candidates share at least one LSH band, then are verified on the signature
+        signature = minhash(words)
+        keys = band_keys(signature)
+        rows = band_index.get(keys)
+        candidates = set(rows[rows >= 0].tolist())
+
+        match, similarity = None, 0.0
+        for row in candidates:
+            estimate = float(np.mean(signatures[row] == signature))
+            if estimate >= JACCARD_THRESHOLD and estimate > similarity:
+                match, similarity = row, estimate
+
+        if match is not None:
+            report.writerow([representative_pmid(match), pmid, 'near', round(similarity, 4)])
+            near_duplicates += 1
+            continue
+
+        # New representative: store its signature and register its digest and unclaimed bands
+        row = add_representative(pmid, signature)
+        exact_index.add(digest, row)
+        band_index.add(keys[rows < 0], row)
+
+        out.write(record)
+        unique += 1
+
+print(f"Total records: {total}")
+print(f"Unique records: {unique}")
+print(f"Exact duplicates: {exact_duplicates}")
+print(f"Near duplicates: {near_duplicates}")
+print(f"Unique abstracts saved to {output_path}; duplicate report saved to {report_path}.")
@@ -0,0 +1,166 @@
+from collections import Counter
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.decomposition import IncrementalPCA
+from sklearn.cluster import MiniBatchKMeans
+from sklearn.neighbors import KNeighborsClassifier
+from sklearn.feature_extraction.text import CountVectorizer
+from topic_summary import summarize_topics
+from instrumentation import stage
+
+# Input files (embeddings.csv holds the PubMedBERT CLS vectors keyed by 'ID')
+embeddings_path = "embeddings.csv"
+metadata_path = "metadata.csv"
+
+# Configuration
+CHUNK_SIZE = 20000  # Embedding / metadata rows read per chunk
+N_COMPONENTS = 50  # Dimensions kept by IncrementalPCA (None to cluster the raw vectors)
+CLUSTER_METHOD = "kmeans"  # "kmeans" (MiniBatchKMeans) or "hdbscan" (density clustering)
+N_CLUSTERS = 20  # Number of clusters for k-means
+MIN_CLUSTER_SIZE = 50  # Minimum cluster size for HDBSCAN
+HDBSCAN_SAMPLE = 50000  # HDBSCAN is fitted on a sample; remaining points get the label of their nearest neighbour
+NUM_WORDS = 20  # Number of keywords per cluster
+MIN_DF = 5  # Keywords must appear in at least MIN_DF abstracts
+MAX_DF = 0.95  # ... and in at most this fraction of them
+
+# Function to stream the embeddings file in chunks
+def iter_embedding_chunks(path, chunk_size):
+    for chunk in pd.read_csv(path, chunksize=chunk_size):
+        ids = chunk.pop('ID').to_numpy()
+        yield ids, chunk.to_numpy(dtype=np.float32)
+
+# Function to reduce the embeddings with two streaming passes (fit, then transform)
+def reduce_embeddings(path, n_components, chunk_size):
+    ipca = None
+    if n_components is not None:
+        ipca = IncrementalPCA(n_components=n_components)
+        for _, vectors in iter_embedding_chunks(path, chunk_size):
+            # IncrementalPCA needs at least n_components rows per partial_fit
+            if vectors.shape[0] >= n_components:
+                ipca.partial_fit(vectors)
+
+        if hasattr(ipca, 'components_'):
+            print(f"Explained variance with {n_components} components: {ipca.explained_variance_ratio_.sum():.2%}")
+        else:
+            print(f"Fewer than {n_components} embeddings per chunk; clustering the raw vectors.")
+            ipca = None
+
+    all_ids, reduced = [], []
+    for ids, vectors in iter_embedding_chunks(path, chunk_size):
+        all_ids.append(ids)
+        reduced.append(ipca.transform(vectors).astype(np.float32) if ipca is not None else vectors)
+
+    return np.concatenate(all_ids), np.vstack(reduced)
+
+# Function to cluster the reduced embeddings
+def cluster_embeddings(vectors):
+    if CLUSTER_METHOD == "kmeans":
+        kmeans = MiniBatchKMeans(n_clusters=N_CLUSTERS, batch_size=4096, n_init=3, random_state=42)
+        return kmeans.fit_predict(vectors)
+
+    if CLUSTER_METHOD == "hdbscan":
+        from sklearn.cluster import HDBSCAN  # Requires scikit-learn >= 1.3
+
+        rng = np.random.RandomState(42)
+        sample = rng.choice(vectors.shape[0], size=min(HDBSCAN_SAMPLE, vectors.shape[0]), replace=False)
+        sample_labels = HDBSCAN(min_cluster_size=MIN_CLUSTER_SIZE).fit_predict(vectors[sample])
+
+        # Propagate the sample labels to every point (noise stays -1)
+        knn = KNeighborsClassifier(n_neighbors=1, n_jobs=-1)
+        knn.fit(vectors[sample], sample_labels)
+        labels = knn.predict(vectors)
+        labels[sample] = sample_labels
+        return labels
+
+    raise ValueError(f"Unknown CLUSTER_METHOD: {CLUSTER_METHOD}")
+
+# Function to stream the abstracts of the clustered documents from the metadata file
+# Yields (texts, cluster_index) per chunk; IDs missing from the embeddings and repeated IDs are skipped.
+def iter_abstract_chunks(path, chunk_size, positions, cluster_index):
+    seen = np.zeros(len(positions), dtype=bool)
+    for chunk in pd.read_csv(path, usecols=['ID', 'Abstract'], chunksize=chunk_size):
+        chunk = chunk.drop_duplicates('ID')
+        chunk = chunk[chunk['ID'].isin(positions.index)]
+        rows = positions.loc[chunk['ID']].to_numpy()
+        keep = ~seen[rows]
+        seen[rows[keep]] = True
+        yield chunk['Abstract'][keep].fillna('').astype(str).tolist(), cluster_index[rows[keep]]
+
+# Function to build the keyword vocabulary from document frequencies (first streaming pass)
+def fit_vocabulary(chunks, min_df, max_df):
+    analyzer = CountVectorizer(stop_words='english').build_analyzer()
+    doc_freq = Counter()
+    n_docs = 0
+    for texts, _ in chunks:
+        for text in texts:
+            doc_freq.update(set(analyzer(text)))
+        n_docs += len(texts)
+    max_count = max_df * n_docs
+    return sorted(term for term, count in doc_freq.items() if min_df <= count <= max_count)
+
+# Function to accumulate the cluster-by-term counts chunk by chunk (second streaming pass)
+def class_term_counts(chunks, vectorizer, n_clusters):
+    class_counts = sparse.csr_matrix((n_clusters, len(vectorizer.vocabulary)), dtype=np.float32)
+    for texts, chunk_cluster_index in chunks:
+        X_chunk = vectorizer.transform(texts)
+        # Sparse cluster-by-document indicator, so the per-cluster term counts are one sparse product
+        indicator = sparse.csr_matrix(
+            (np.ones(len(texts), dtype=np.float32), (chunk_cluster_index, np.arange(len(texts)))),
+            shape=(n_clusters, len(texts))
+        )
+        class_counts = class_counts + indicator @ X_chunk
+    return class_counts
+
+# Function to compute class-based TF-IDF from the cluster-by-term counts
+def class_tfidf(class_counts):
+    # tf: term frequency within each cluster; idf: log(1 + average words per cluster / term frequency)
+    words_per_class = np.asarray(class_counts.sum(axis=1)).ravel()
+    term_frequency = np.asarray(class_counts.sum(axis=0)).ravel()
+    tf = sparse.diags(1.0 / np.maximum(words_per_class, 1)) @ class_counts
+    idf = np.log(1 + words_per_class.mean() / np.maximum(term_frequency, 1))
+    return (tf @ sparse.diags(idf)).tocsr()
+
+# Reduce and cluster the embeddings
+with stage("reduce") as run:
+    ids, vectors = reduce_embeddings(embeddings_path, N_COMPONENTS, CHUNK_SIZE)
+    run["items"] = len(ids)
+print(f"Embeddings used for clustering: {vectors.shape}")
+
+with stage("cluster", items=len(ids)):
+    labels = cluster_embeddings(vectors)
+del vectors
+
+# Position of every embedding ID (first occurrence) and its cluster row
+clusters, sizes = np.unique(labels, return_counts=True)
+cluster_index = np.searchsorted(clusters, labels)
+id_index = pd.Index(ids)
+positions = pd.Series(np.arange(len(ids)), index=id_index)[~id_index.duplicated()]
+
+# Keywords: stream metadata.csv twice (vocabulary, then per-cluster counts) instead of loading every abstract
+with stage("vectorize") as run:
+    vocabulary = fit_vocabulary(
+        iter_abstract_chunks(metadata_path, CHUNK_SIZE, positions, cluster_index), MIN_DF, MAX_DF
+    )
+    vectorizer = CountVectorizer(stop_words='english', vocabulary=vocabulary, dtype=np.float32)
+    class_counts = class_term_counts(
+        iter_abstract_chunks(metadata_path, CHUNK_SIZE, positions, cluster_index), vectorizer, clusters.size
+    )
+    run["items"] = len(positions)
+print(f"Keyword vocabulary: {len(vocabulary)} terms")
+
+# c-TF-IDF keywords per cluster
+with stage("ctfidf", items=clusters.size):
+    ctfidf = class_tfidf(class_counts)
+feature_names = np.asarray(vocabulary)
+
+topics_df = summarize_topics(
+    ctfidf, feature_names, sizes, NUM_WORDS, topic_labels=clusters,
+    topic_column='Cluster', frequency_column='Size'
+)
+
+# Save results
+topics_df.to_csv("embedding_topics.csv", index=False)
+pd.DataFrame({'ID': ids, 'Cluster': labels}).to_csv("embedding_topic_assignments.csv", index=False)
+
+print(topics_df)
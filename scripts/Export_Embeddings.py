@@ -0,0 +1,32 @@
+import numpy as np
+import pandas as pd
+import torch
+from amyloidBERT import load_abstracts
+
+# Input and output files
+abstracts_path = "unique_abstracts.txt"
+embeddings_path = "embeddings.pt"
+output_path = "embeddings.csv"
+
+CHUNK_SIZE = 20000  # Rows written per chunk
+
+# Load embeddings; row i belongs to abstract i of unique_abstracts.txt
+embeddings = torch.load(embeddings_path).numpy()
+abstracts = load_abstracts(abstracts_path)
+
+if embeddings.shape[0] != len(abstracts):
+    raise ValueError(
+        f"{embeddings_path} has {embeddings.shape[0]} rows but {abstracts_path} has {len(abstracts)} abstracts. "
+        "Finish the embedding run before exporting."
+    )
+
+# 'ID' is the PMID, which is the key metadata.csv is expected to use
+ids = [abstract.split('\n', 1)[0][len('Abstract #'):].strip() for abstract in abstracts]
+columns = [f"Dim_{i + 1}" for i in range(embeddings.shape[1])]
+
+for start in range(0, len(ids), CHUNK_SIZE):
+    chunk = pd.DataFrame(embeddings[start:start + CHUNK_SIZE].astype(np.float32), columns=columns)
+    chunk.insert(0, 'ID', ids[start:start + CHUNK_SIZE])
+    chunk.to_csv(output_path, mode='w' if start == 0 else 'a', header=start == 0, index=False)
+
+print(f"Exported {len(ids)} embeddings to {output_path}.")
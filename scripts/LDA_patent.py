@@ -5,6 +5,8 @@ from nltk.tokenize import word_tokenize
 from nltk.corpus import stopwords
 from sklearn.feature_extraction.text import CountVectorizer
 from sklearn.decomposition import LatentDirichletAllocation as LDA
+from topic_summary import summarize_topics
+from instrumentation import stage
 
 # Function to download NLTK resources if necessary
 def download_nltk_resources():
@@ -38,43 +40,35 @@ def preprocess(text):
 data = pd.read_csv('all_patent_file.csv')
 
 # Apply preprocessing
-data['tokens'] = data['Title'].apply(preprocess)
+with stage("preprocess", items=len(data)):
+    data['tokens'] = data['Title'].apply(preprocess)
 
 # Join tokens back into strings
 data['processed_text'] = data['tokens'].apply(lambda x: ' '.join(x))
 
 # Vectorization
 vectorizer = CountVectorizer()
-X = vectorizer.fit_transform(data['processed_text'])
+with stage("vectorize", items=len(data)):
+    X = vectorizer.fit_transform(data['processed_text'])
 
 # Define and train the LDA model
 n_topics = 5  # Number of topics
 lda_model = LDA(n_components=n_topics, random_state=42)
-lda_model.fit(X)
+with stage("lda_fit", items=X.shape[0]):
+    lda_model.fit(X)
 
 # Compute topic distribution for each document
-topic_distribution = lda_model.transform(X)
+with stage("lda_transform", items=X.shape[0]):
+    topic_distribution = lda_model.transform(X)
 
 # Compute the average frequency of each topic
 topic_frequencies = np.mean(topic_distribution, axis=0)
 
-# Create a DataFrame for topics and their frequencies
-topic_frequencies_df = pd.DataFrame({
-    'Topic': [f'Topic {i + 1}' for i in range(n_topics)],
-    'Frequency': topic_frequencies
-})
-
-# Retrieve the most important words for each topic
+# Summarize topics: frequencies, top words and their weights
 num_words = 50  # Number of words to display per topic
-topic_words = {}
-
-for index, topic in enumerate(lda_model.components_):
-    words = [vectorizer.get_feature_names_out()[i] for i in topic.argsort()[-num_words:]]
-    topic_words[f'Topic {index + 1}'] = words
-
-# Add most important words to the DataFrame
-for i, words in enumerate(topic_words.values()):
-    topic_frequencies_df.loc[i, 'Top_Words'] = ', '.join(words)
+feature_names = vectorizer.get_feature_names_out()
+with stage("topic_summary", items=n_topics):
+    topic_frequencies_df = summarize_topics(lda_model.components_, feature_names, topic_frequencies, num_words)
 
 # Save as CSV for use in R
 topic_frequencies_df.to_csv('patent_topic_frequencies.csv', index=False)
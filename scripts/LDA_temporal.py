@@ -1,10 +1,25 @@
+import copy
 import pandas as pd
 import numpy as np
 import nltk
 from nltk.tokenize import word_tokenize
 from nltk.corpus import stopwords
+from joblib import Parallel, delayed
 from sklearn.feature_extraction.text import CountVectorizer
 from sklearn.decomposition import LatentDirichletAllocation as LDA
+from topic_summary import summarize_topics
+from instrumentation import stage
+
+# Temporal mode: "slice" fits a single LDA on START_YEAR..END_YEAR,
+# "sliding" walks year windows over the whole corpus with an online LDA
+# warm-started from the previous window so topics stay aligned across time
+TEMPORAL_MODE = "slice"
+START_YEAR = 2020
+END_YEAR = 2025
+WINDOW_SIZE = 5  # Years per window (sliding mode)
+WINDOW_STEP = 1  # Years between consecutive window starts (sliding mode)
+BATCH_SIZE = 512  # Mini-batch size for partial_fit (sliding mode)
+N_JOBS = -1  # Parallel workers for the per-window summaries
 
 # Function to download NLTK resources if necessary
 def download_nltk_resources():
@@ -34,56 +49,137 @@ def preprocess(text):
     tokens = [word for word in tokens if word.isalnum() and word not in stop_words]
     return tokens
 
+# Function to check the sliding-window settings
+def check_window_settings(size, step):
+    if size < 1 or step < 1:
+        raise ValueError(f"WINDOW_SIZE and WINDOW_STEP must be >= 1, got {size} and {step}.")
+
+# Function to build the (start, end) year windows covering first_year..last_year
+def year_windows(first_year, last_year, size, step):
+    check_window_settings(size, step)
+    windows = []
+    start = first_year
+    while True:
+        end = start + size - 1
+        windows.append((start, end))
+        if end >= last_year:
+            break
+        start += step
+    return windows
+
+# Function to fit an online LDA over consecutive windows, warm-starting each
+# window from the state left by the previous one
+def fit_sliding_windows(X, years, windows, n_topics, batch_size):
+    lda_model = LDA(n_components=n_topics, learning_method='online', batch_size=batch_size, random_state=42)
+    rng = np.random.RandomState(42)
+    snapshots = []
+
+    for start, end in windows:
+        rows = np.flatnonzero((years >= start) & (years <= end))
+        if rows.size == 0:
+            print(f"Window {start}-{end}: no documents, skipping.")
+            continue
+
+        # Each window is the "corpus" seen by the online update
+        lda_model.set_params(total_samples=rows.size)
+
+        # The online step size is (learning_offset + n_batch_iter_) ** -learning_decay. Restart the
+        # iteration count so each window can move the topics it inherits instead of inheriting a
+        # step size that has already decayed over every earlier window.
+        if hasattr(lda_model, 'components_'):
+            lda_model.n_batch_iter_ = 1
+
+        # partial_fit splits the window into mini-batches of batch_size itself
+        lda_model.partial_fit(X[rng.permutation(rows)])
+
+        print(f"Window {start}-{end}: fitted on {rows.size} documents.")
+        snapshots.append((start, end, rows, copy.deepcopy(lda_model)))
+
+    return snapshots
+
+# Function to compute topic prevalence and top words for one fitted window
+def summarize_window(start, end, lda_model, X_window, feature_names, num_words):
+    topic_frequencies = np.mean(lda_model.transform(X_window), axis=0)
+    summary = summarize_topics(lda_model.components_, feature_names, topic_frequencies, num_words)
+    summary.insert(0, 'Window_Start', start)
+    summary.insert(1, 'Window_End', end)
+    summary.insert(2, 'Documents', X_window.shape[0])
+    return summary
+
+# Validate the window settings before any preprocessing
+if TEMPORAL_MODE == "sliding":
+    check_window_settings(WINDOW_SIZE, WINDOW_STEP)
+
 # Load data
 data = pd.read_csv('metadata.csv')
 
 # Extracting the year from the 'Publication_Date' column (assuming format 'YYYY-MM-DD' or similar)
 data['Year'] = pd.to_datetime(data['Publication_Date'], errors='coerce').dt.year
 
-# Filter data for the period 2020 to 2025
-data = data[(data['Year'] >= 2020) & (data['Year'] <= 2025)]
+if TEMPORAL_MODE == "sliding":
+    # Keep every dated publication; windows are selected later
+    data = data.dropna(subset=['Year'])
+else:
+    # Filter data for the period START_YEAR to END_YEAR
+    data = data[(data['Year'] >= START_YEAR) & (data['Year'] <= END_YEAR)]
 
 # Apply preprocessing
-data['tokens'] = data['Abstract'].apply(preprocess)
+with stage("preprocess", items=len(data)):
+    data['tokens'] = data['Abstract'].apply(preprocess)
 
 # Join tokens back into strings
 data['processed_text'] = data['tokens'].apply(lambda x: ' '.join(x))
 
-# Vectorization
+# Vectorization (a single vocabulary shared by every window)
 vectorizer = CountVectorizer()
-X = vectorizer.fit_transform(data['processed_text'])
+with stage("vectorize", items=len(data)):
+    X = vectorizer.fit_transform(data['processed_text'])
 
-# Define and train the LDA model
 n_topics = 5  # Number of topics
-lda_model = LDA(n_components=n_topics, random_state=42)
-lda_model.fit(X)
-
-# Compute topic distribution for each document
-topic_distribution = lda_model.transform(X)
-
-# Compute the average frequency of each topic
-topic_frequencies = np.mean(topic_distribution, axis=0)
-
-# Create a DataFrame for topics and their frequencies
-topic_frequencies_df = pd.DataFrame({
-    'Topic': [f'Topic {i + 1}' for i in range(n_topics)],
-    'Frequency': topic_frequencies
-})
-
-# Retrieve the most important words for each topic
 num_words = 50  # Number of words to display per topic
-topic_words = {}
-
-for index, topic in enumerate(lda_model.components_):
-    words = [vectorizer.get_feature_names_out()[i] for i in topic.argsort()[-num_words:]]
-    topic_words[f'Topic {index + 1}'] = words
-
-# Add most important words to the DataFrame
-for i, words in enumerate(topic_words.values()):
-    topic_frequencies_df.loc[i, 'Top_Words'] = ', '.join(words)
-
-# Save as CSV for use in R
-topic_frequencies_df.to_csv('topic_frequencies.csv', index=False)
 
-# Display the DataFrame
-print(topic_frequencies_df)
+if TEMPORAL_MODE == "sliding":
+    years = data['Year'].astype(int).to_numpy()
+    windows = year_windows(years.min(), years.max(), WINDOW_SIZE, WINDOW_STEP)
+
+    # Fitting is sequential because each window warm-starts from the previous one
+    with stage("lda_fit", items=X.shape[0]):
+        snapshots = fit_sliding_windows(X, years, windows, n_topics, BATCH_SIZE)
+
+    # Summaries only read a frozen snapshot, so windows run in parallel
+    feature_names = vectorizer.get_feature_names_out()
+    # Items count every document once per window it appears in; cpu_s excludes the joblib workers
+    with stage("lda_transform", items=sum(rows.size for _, _, rows, _ in snapshots)):
+        summaries = Parallel(n_jobs=N_JOBS)(
+            delayed(summarize_window)(start, end, model, X[rows], feature_names, num_words)
+            for start, end, rows, model in snapshots
+        )
+
+    # Long-format table: one row per window and topic
+    temporal_topics_df = pd.concat(summaries, ignore_index=True)
+    temporal_topics_df.to_csv('temporal_topic_frequencies.csv', index=False)
+    print(temporal_topics_df)
+
+else:
+    # Define and train the LDA model
+    lda_model = LDA(n_components=n_topics, random_state=42)
+    with stage("lda_fit", items=X.shape[0]):
+        lda_model.fit(X)
+
+    # Compute topic distribution for each document
+    with stage("lda_transform", items=X.shape[0]):
+        topic_distribution = lda_model.transform(X)
+
+    # Compute the average frequency of each topic
+    topic_frequencies = np.mean(topic_distribution, axis=0)
+
+    # Summarize topics: frequencies, top words and their weights
+    feature_names = vectorizer.get_feature_names_out()
+    with stage("topic_summary", items=n_topics):
+        topic_frequencies_df = summarize_topics(lda_model.components_, feature_names, topic_frequencies, num_words)
+
+    # Save as CSV for use in R
+    topic_frequencies_df.to_csv('topic_frequencies.csv', index=False)
+
+    # Display the DataFrame
+    print(topic_frequencies_df)
@@ -2,6 +2,7 @@ from Bio import Entrez
 import time
 import xml.etree.ElementTree as ET
 import re
+from instrumentation import stage, record
 
 # Entrez configuration
 Entrez.email = "@.com"  
@@ -26,7 +27,12 @@ def remove_forbidden_words(text, forbidden_words):
     return text.strip()
 
 # Function to process XML returned by the API
+# Records the "parse" and "clean" stages once per call; parse time excludes the cleaning
 def parse_abstracts(xml_data, forbidden_words):
+    wall_start, cpu_start = time.perf_counter(), time.process_time()
+    clean_wall = clean_cpu = 0.0
+    cleaned = 0
+
     root = ET.fromstring(xml_data)
     abstracts = []
 
@@ -53,7 +59,11 @@ def parse_abstracts(xml_data, forbidden_words):
         abstract = " ".join(extract_full_text(a) for a in abstract_texts if a.text).strip() if abstract_texts else "No Abstract"
         
         if abstract != "No Abstract":
+            clean_wall_start, clean_cpu_start = time.perf_counter(), time.process_time()
             abstract = remove_forbidden_words(abstract, forbidden_words)
+            clean_wall += time.perf_counter() - clean_wall_start
+            clean_cpu += time.process_time() - clean_cpu_start
+            cleaned += 1
 
         abstracts.append({
             "pmid": pmid,
@@ -63,13 +73,10 @@ def parse_abstracts(xml_data, forbidden_words):
             "journal": journal,
             "pub_date": pub_date
         })
-    return abstracts
 
-# Load PMIDs
-with open("pmids.txt", "r") as f:
-    pmid_list = [line.strip() for line in f if line.strip().isdigit()]
-
-print(f"Total PMIDs loaded: {len(pmid_list)}")
+    record("clean", clean_wall, clean_cpu, cleaned)
+    record("parse", time.perf_counter() - wall_start - clean_wall, time.process_time() - cpu_start - clean_cpu, len(abstracts))
+    return abstracts
 
 # Forbidden words
 forbidden_words = [
@@ -78,56 +85,69 @@ forbidden_words = [
     "Introduction:", "Methods:", "Results:", "Conclusions:", "Objectives:","[reaction: see text]"
 ] #exemaples
 
-all_abstracts = []
-missing_abstracts = []
-
-# Request in batches with retries
-batch_size = 50
-for i in range(0, len(pmid_list), batch_size):
-    id_list = pmid_list[i:i + batch_size]
-    id_str = ",".join(id_list)
-    
-    for attempt in range(3):  # Up to 3 attempts per batch
-        try:
-            print(f"Fetching abstracts for batch {i // batch_size + 1}, attempt {attempt + 1}")
-            fetch_handle = Entrez.efetch(db="pubmed", id=id_str, rettype="abstract", retmode="xml")
-            xml_data = fetch_handle.read()
-            fetch_handle.close()
-            
-            if not xml_data.strip():  # If the returned XML is empty
-                raise ValueError("Empty XML returned by the API.")
-            
-            with open(f"debug_batch_{i}.xml", "w") as xml_file:
-                xml_file.write(xml_data)
-
-            parsed_data = parse_abstracts(xml_data, forbidden_words)
-            all_abstracts.extend(parsed_data)
-            break  # Exit retry loop if successful
-        except Exception as e:
-            print(f"Error fetching batch {i // batch_size + 1}, attempt {attempt + 1}: {e}")
-            time.sleep(5)  # Wait before retrying
-    else:
-        print(f"Failed all attempts for batch {i // batch_size + 1}.")
-        missing_abstracts.extend(id_list)
-
-    time.sleep(3)  # Respect API limits
-
-# Save abstracts
-with open("abstracts.txt", "w") as f:
-    for abstract in all_abstracts:
-        f.write(f"Abstract #{abstract['pmid']}\n")
-        f.write(f"Title: {abstract['title']}\n")
-        f.write(f"Authors: {abstract['authors']}\n")
-        f.write(f"Abstract: {abstract['abstract']}\n")
-        f.write(f"Journal: {abstract['journal']}\n")
-        f.write(f"Publication Date: {abstract['pub_date']}\n")
-        f.write("\n")
-
-print("Abstracts successfully saved.")
-
-# Save missing PMIDs
-with open("missing_abstracts.txt", "w") as f:
-    for pmid in missing_abstracts:
-        f.write(f"{pmid}\n")
-
-print(f"Total missing PMIDs: {len(missing_abstracts)}")
+def main():
+    # Load PMIDs
+    with open("pmids.txt", "r") as f:
+        pmid_list = [line.strip() for line in f if line.strip().isdigit()]
+
+    print(f"Total PMIDs loaded: {len(pmid_list)}")
+
+    all_abstracts = []
+    missing_abstracts = []
+
+    # Request in batches with retries
+    batch_size = 50
+    for i in range(0, len(pmid_list), batch_size):
+        id_list = pmid_list[i:i + batch_size]
+        id_str = ",".join(id_list)
+
+        for attempt in range(3):  # Up to 3 attempts per batch
+            try:
+                print(f"Fetching abstracts for batch {i // batch_size + 1}, attempt {attempt + 1}")
+                # Every attempt counts as a call; only a validated response counts its items
+                with stage("fetch") as run:
+                    fetch_handle = Entrez.efetch(db="pubmed", id=id_str, rettype="abstract", retmode="xml")
+                    xml_data = fetch_handle.read()
+                    fetch_handle.close()
+
+                    if not xml_data.strip():  # If the returned XML is empty
+                        raise ValueError("Empty XML returned by the API.")
+                    run["items"] = len(id_list)
+
+                with open(f"debug_batch_{i}.xml", "w") as xml_file:
+                    xml_file.write(xml_data)
+
+                parsed_data = parse_abstracts(xml_data, forbidden_words)
+                all_abstracts.extend(parsed_data)
+                break  # Exit retry loop if successful
+            except Exception as e:
+                print(f"Error fetching batch {i // batch_size + 1}, attempt {attempt + 1}: {e}")
+                time.sleep(5)  # Wait before retrying
+        else:
+            print(f"Failed all attempts for batch {i // batch_size + 1}.")
+            missing_abstracts.extend(id_list)
+
+        time.sleep(3)  # Respect API limits
+
+    # Save abstracts
+    with open("abstracts.txt", "w") as f:
+        for abstract in all_abstracts:
+            f.write(f"Abstract #{abstract['pmid']}\n")
+            f.write(f"Title: {abstract['title']}\n")
+            f.write(f"Authors: {abstract['authors']}\n")
+            f.write(f"Abstract: {abstract['abstract']}\n")
+            f.write(f"Journal: {abstract['journal']}\n")
+            f.write(f"Publication Date: {abstract['pub_date']}\n")
+            f.write("\n")
+
+    print("Abstracts successfully saved.")
+
+    # Save missing PMIDs
+    with open("missing_abstracts.txt", "w") as f:
+        for pmid in missing_abstracts:
+            f.write(f"{pmid}\n")
+
+    print(f"Total missing PMIDs: {len(missing_abstracts)}")
+
+if __name__ == "__main__":
+    main()
@@ -1,24 +1,44 @@
 import os
+import sys
+import json
 import torch
 from transformers import BertTokenizer, BertModel
 import time
 import gc
+from instrumentation import stage
+
+MODEL_NAME = "microsoft/BiomedNLP-PubMedBERT-base-uncased-abstract"
+
+# Embedding configuration
+EMBEDDING_MODE = "truncate"  # "truncate" keeps the first MAX_LENGTH tokens; "sliding" embeds overlapping windows
+POOLING = "cls"  # "cls", "mean" (attention-masked token mean) or "weighted_mean" (windows weighted by token count)
+MAX_LENGTH = 512
+WINDOW_STRIDE = 128  # Tokens shared by consecutive windows (sliding mode)
+MIN_TAIL_TOKENS = 1  # A last window adding fewer new tokens than this is dropped (sliding mode; 1 keeps every tail)
+BATCH_SIZE = 50  # Abstracts per batch (truncate mode) or windows per batch (sliding mode)
 
 # Define the device (CUDA, MPS, or CPU)
 device = torch.device("cuda" if torch.cuda.is_available() else "mps" if torch.backends.mps.is_available() else "cpu")
-print(f"Using device: {device}")
 
-# Load the tokenizer and model
-tokenizer = BertTokenizer.from_pretrained("microsoft/BiomedNLP-PubMedBERT-base-uncased-abstract")
-model = BertModel.from_pretrained("microsoft/BiomedNLP-PubMedBERT-base-uncased-abstract").to(device)
-model.eval()
+# Tokenizer and model, set by load_model()
+tokenizer = None
+model = None
+
+def load_model(model_name=MODEL_NAME):
+    """Load the tokenizer and model (a hub name or a local directory)."""
+    global tokenizer, model
+    print(f"Using device: {device}")
+    tokenizer = BertTokenizer.from_pretrained(model_name)
+    model = BertModel.from_pretrained(model_name).to(device)
+    model.eval()
 
 def load_abstracts(file_path):
     """Load abstracts from the specified text file."""
     try:
         with open(file_path, 'r') as f:
             content = f.read()
-            abstracts = content.split('\nAbstract #')
+            # Leading newline so a record at the very start of the file is split like the others
+            abstracts = ('\n' + content).split('\nAbstract #')
             abstracts = ['Abstract #' + abstract for abstract in abstracts[1:]]
         print(f"Loaded {len(abstracts)} abstracts.")
         return abstracts
@@ -31,24 +51,106 @@ def tokenize_abstracts(abstracts, batch_size=50):
     token_lengths = []  # Debugging token lengths
     for i in range(0, len(abstracts), batch_size):
         batch = abstracts[i:i + batch_size]
-        tokenized = tokenizer(batch, padding=True, truncation=True, return_tensors='pt', max_length=512)
+        with stage("tokenize", items=len(batch)):
+            tokenized = tokenizer(batch, padding=True, truncation=True, return_tensors='pt', max_length=MAX_LENGTH)
         token_lengths.extend([len(ids) for ids in tokenized['input_ids']])
         yield tokenized
 
     print(f"Average token length: {sum(token_lengths) / len(token_lengths):.2f}")
     print(f"Maximum token length: {max(token_lengths)}")
 
-def generate_embeddings(tokenized_batch):
-    """Generate embeddings from the tokenized batch."""
+def check_window_settings(max_length=MAX_LENGTH, stride=WINDOW_STRIDE):
+    """Raise if the sliding-window settings cannot produce advancing windows."""
+    if not 0 <= stride < max_length - 2:
+        raise ValueError(f"WINDOW_STRIDE must be between 0 and MAX_LENGTH - 3 ({max_length - 3}), got {stride}.")
+
+def split_windows(ids, max_length=MAX_LENGTH, stride=WINDOW_STRIDE, min_tail=MIN_TAIL_TOKENS):
+    """Split token ids (without special tokens) into overlapping windows covering the text.
+
+    Windows advance by a fixed step. The last window may be short; weighted_mean pooling weights it by its
+    token count. With min_tail > 1, a last window adding fewer than min_tail new tokens is dropped.
+    """
+    check_window_settings(max_length, stride)
+    window = max_length - 2  # Room for [CLS] and [SEP]
+    step = window - stride
+    starts = [0]
+    while starts[-1] + window < len(ids):
+        starts.append(starts[-1] + step)
+    if len(starts) > 1 and len(ids) - (starts[-2] + window) < min_tail:
+        starts.pop()
+    return [ids[start:start + window] for start in starts]
+
+def tokenize_sliding_windows(abstracts, batch_size=50):
+    """Split abstracts into overlapping windows and pack windows of many abstracts into shared batches.
+
+    Batches always hold whole abstracts, so every batch yields complete document embeddings.
+    Each batch carries a 'doc_index' tensor mapping every window to its abstract within the batch.
+    """
+    windows, doc_index = [], []
+    n_docs = 0
+    window_counts = []
+
+    def flush():
+        tokenized = tokenizer.pad({'input_ids': windows}, return_tensors='pt')
+        tokenized['doc_index'] = torch.tensor(doc_index)
+        return tokenized
+
+    for i in range(0, len(abstracts), batch_size):
+        batch = abstracts[i:i + batch_size]
+        with stage("tokenize", items=len(batch)):
+            encoded = tokenizer(batch, add_special_tokens=False)['input_ids']
+        for ids in encoded:
+            chunks = [tokenizer.build_inputs_with_special_tokens(chunk) for chunk in split_windows(ids)]
+            window_counts.append(len(chunks))
+
+            if windows and len(windows) + len(chunks) > batch_size:
+                yield flush()
+                windows, doc_index, n_docs = [], [], 0
+
+            windows.extend(chunks)
+            doc_index.extend([n_docs] * len(chunks))
+            n_docs += 1
+
+    if windows:
+        yield flush()
+
+    print(f"Average windows per abstract: {sum(window_counts) / len(window_counts):.2f}")
+    print(f"Maximum windows per abstract: {max(window_counts)}")
+
+def generate_embeddings(tokenized_batch, pooling=POOLING):
+    """Generate one pooled embedding per sequence of the tokenized batch."""
     input_ids = tokenized_batch['input_ids'].to(device)
     attention_mask = tokenized_batch['attention_mask'].to(device)
 
-    with torch.no_grad():
+    with stage("embed", items=input_ids.shape[0]), torch.no_grad():
         outputs = model(input_ids=input_ids, attention_mask=attention_mask)
-        embeddings = outputs.last_hidden_state[:, 0, :]  # Extract [CLS] embeddings
-    
+        if pooling == "cls":
+            embeddings = outputs.last_hidden_state[:, 0, :]  # Extract [CLS] embeddings
+        else:
+            # Mean over real tokens only (padding masked out)
+            mask = attention_mask.unsqueeze(-1).to(outputs.last_hidden_state.dtype)
+            embeddings = (outputs.last_hidden_state * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1)
+        if device.type == "cuda":
+            torch.cuda.synchronize()  # Include the GPU work in the stage timing
+
     return embeddings
 
+def pool_documents(window_embeddings, tokenized_batch, pooling=POOLING):
+    """Pool window embeddings back into one embedding per abstract."""
+    doc_index = tokenized_batch['doc_index'].to(device)
+    n_docs = int(doc_index.max()) + 1
+
+    if pooling == "weighted_mean":
+        # Weight each window by its real token count
+        weights = tokenized_batch['attention_mask'].sum(dim=1).to(device, window_embeddings.dtype)
+    else:
+        weights = torch.ones(window_embeddings.shape[0], device=device, dtype=window_embeddings.dtype)
+
+    summed = torch.zeros(n_docs, window_embeddings.shape[1], device=device, dtype=window_embeddings.dtype)
+    summed.index_add_(0, doc_index, window_embeddings * weights.unsqueeze(-1))
+    totals = torch.zeros(n_docs, device=device, dtype=window_embeddings.dtype).index_add_(0, doc_index, weights)
+    return summed / totals.unsqueeze(-1)
+
 def save_embeddings(embeddings_list, file_name="embeddings.pt", append=False):
     """Save generated embeddings to a file."""
     all_embeddings = torch.cat(embeddings_list, dim=0)
@@ -63,26 +165,65 @@ def save_embeddings(embeddings_list, file_name="embeddings.pt", append=False):
     # Save embeddings to the CPU for compatibility
     torch.save(all_embeddings.cpu(), file_name)
 
+def embedding_settings():
+    """Settings that determine how embeddings are produced."""
+    return {
+        "model": MODEL_NAME,
+        "mode": EMBEDDING_MODE,
+        "pooling": POOLING,
+        "max_length": MAX_LENGTH,
+        "window_stride": WINDOW_STRIDE if EMBEDDING_MODE == "sliding" else None,
+        "min_tail_tokens": MIN_TAIL_TOKENS if EMBEDDING_MODE == "sliding" else None,
+    }
+
+def save_metadata(embeddings_file, file_name="embeddings_metadata.json"):
+    """Record the embedding settings and shape next to the embeddings file."""
+    embeddings = torch.load(embeddings_file)
+    metadata = dict(embedding_settings(), count=embeddings.shape[0], dim=embeddings.shape[1])
+    with open(file_name, 'w') as f:
+        json.dump(metadata, f, indent=2)
+
 def main():
     """Main function to run the embedding generation process."""
     start_time = time.time()
 
+    if EMBEDDING_MODE == "sliding":
+        check_window_settings()
+    load_model()
     abstracts = load_abstracts('unique_abstracts.txt')
 
     # Checkpoint for resuming progress
     embeddings_file = "embeddings.pt"
+    metadata_file = "embeddings_metadata.json"
     processed_count = 0
     if os.path.exists(embeddings_file):
+        if os.path.exists(metadata_file):
+            with open(metadata_file, 'r') as f:
+                existing_metadata = json.load(f)
+            existing_settings = {key: existing_metadata.get(key) for key in embedding_settings()}
+            if existing_settings != embedding_settings():
+                print(f"Existing embeddings were generated with {existing_settings}, "
+                      f"not {embedding_settings()}. Remove {embeddings_file} to start over.")
+                sys.exit(1)
+
         existing_embeddings = torch.load(embeddings_file)
         processed_count = existing_embeddings.shape[0]
         print(f"{processed_count} abstracts already processed. Resuming...")
 
     embeddings_list = []
     save_interval = 10  # Save every 10 batches
+    failed = False
+
+    if EMBEDDING_MODE == "sliding":
+        batches = tokenize_sliding_windows(abstracts[processed_count:], batch_size=BATCH_SIZE)
+    else:
+        batches = tokenize_abstracts(abstracts[processed_count:], batch_size=BATCH_SIZE)
 
     try:
-        for i, tokenized_batch in enumerate(tokenize_abstracts(abstracts[processed_count:], batch_size=50), start=1):
+        for i, tokenized_batch in enumerate(batches, start=1):
             embeddings = generate_embeddings(tokenized_batch)
+            if EMBEDDING_MODE == "sliding":
+                embeddings = pool_documents(embeddings, tokenized_batch)
             print(f"Generated embeddings with shape: {embeddings.shape}")
             embeddings_list.append(embeddings)
 
@@ -96,6 +237,15 @@ def main():
     
     except Exception as e:
         print(f"Error during embeddings generation: {e}")
+        failed = True
+
+    if os.path.exists(embeddings_file):
+        save_metadata(embeddings_file, metadata_file)
+
+    # Non-zero exit so callers (e.g. run_pipeline.py) do not treat partial embeddings as complete
+    if failed:
+        print("Embeddings generation stopped early; rerun to resume.")
+        sys.exit(1)
     
     print("Embeddings successfully generated and saved.")
     total_time = time.time() - start_time
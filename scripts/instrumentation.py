@@ -0,0 +1,137 @@
+import atexit
+import csv
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+# Reports are written to PROFILE_DIR at exit; set AMYLOID_PROFILE=0 to disable them.
+# Set AMYLOID_SAMPLER=pyinstrument to also record a sampling profile of the whole run.
+PROFILE_ENABLED = os.environ.get("AMYLOID_PROFILE", "1") != "0"
+PROFILE_DIR = os.environ.get("AMYLOID_PROFILE_DIR", "profile_reports")
+SAMPLER = os.environ.get("AMYLOID_SAMPLER", "")
+
+RUN_NAME = os.path.splitext(os.path.basename(sys.argv[0] or "interactive"))[0]
+RUN_STARTED = time.strftime("%Y%m%d-%H%M%S")
+
+# Aggregated measurements, keyed by stage name
+stages = {}
+caches = {}
+
+# Function to read the peak resident set size of the process in MB
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes on Linux
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+# Function to add one measurement to a stage; repeated measurements of the same stage are accumulated
+# rss_growth_mb is how far the stage raised the process peak RSS (0 if it stayed below an earlier peak);
+# the largest growth over all calls is kept.
+def record(name, wall_s, cpu_s, items=None, rss_growth_mb=None):
+    entry = stages.setdefault(name, {"calls": 0, "wall_s": 0.0, "cpu_s": 0.0, "items": 0, "rss_growth_mb": None})
+    entry["calls"] += 1
+    entry["wall_s"] += wall_s
+    entry["cpu_s"] += cpu_s
+    entry["items"] += items or 0
+    if rss_growth_mb is not None:
+        entry["rss_growth_mb"] = max(entry["rss_growth_mb"] or 0.0, rss_growth_mb)
+
+# Context manager timing one execution of a stage
+# The yielded dict lets the caller set 'items' once the number of processed items is known.
+# CPU time covers this process only (not worker processes started by the stage).
+@contextmanager
+def stage(name, items=None):
+    run = {"items": items}
+    rss_start = peak_rss_mb()
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    try:
+        yield run
+    finally:
+        wall = time.perf_counter() - wall_start
+        cpu = time.process_time() - cpu_start
+        rss_end = peak_rss_mb()
+        growth = rss_end - rss_start if rss_start is not None else None
+        record(name, wall, cpu, run["items"], growth)
+
+# Function to count a cache lookup
+def cache_lookup(name, hit):
+    entry = caches.setdefault(name, {"hits": 0, "misses": 0})
+    entry["hits" if hit else "misses"] += 1
+
+# Function to build the report rows (one per stage and one per cache)
+def report_rows():
+    rows = []
+    for name, entry in stages.items():
+        rows.append({
+            "kind": "stage",
+            "name": name,
+            "calls": entry["calls"],
+            "wall_s": round(entry["wall_s"], 6),
+            "cpu_s": round(entry["cpu_s"], 6),
+            "items": entry["items"],
+            "items_per_s": round(entry["items"] / entry["wall_s"], 3) if entry["items"] and entry["wall_s"] > 0 else None,
+            "rss_growth_mb": round(entry["rss_growth_mb"], 1) if entry["rss_growth_mb"] is not None else None,
+        })
+    for name, entry in caches.items():
+        lookups = entry["hits"] + entry["misses"]
+        rows.append({
+            "kind": "cache",
+            "name": name,
+            "calls": lookups,
+            "hits": entry["hits"],
+            "misses": entry["misses"],
+            "hit_rate": round(entry["hits"] / lookups, 4) if lookups else None,
+        })
+    return rows
+
+# Function to write the JSON and CSV reports of this run (the run-level peak RSS is in the JSON)
+def write_report(directory=PROFILE_DIR, name=None):
+    rows = report_rows()
+    if not rows:
+        return None
+
+    os.makedirs(directory, exist_ok=True)
+    base = os.path.join(directory, f"{name or RUN_NAME}_{RUN_STARTED}")
+    with open(f"{base}.json", "w") as f:
+        json.dump({"run": name or RUN_NAME, "started": RUN_STARTED, "peak_rss_mb": peak_rss_mb(), "rows": rows}, f, indent=2)
+
+    columns = ["kind", "name", "calls", "wall_s", "cpu_s", "items", "items_per_s", "rss_growth_mb", "hits", "misses", "hit_rate"]
+    with open(f"{base}.csv", "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=columns)
+        writer.writeheader()
+        writer.writerows(rows)
+
+    print(f"Profile report saved to {base}.json / {base}.csv")
+    return base
+
+# Optional sampling profiler hook
+sampler = None
+if SAMPLER == "pyinstrument":
+    try:
+        from pyinstrument import Profiler
+        sampler = Profiler()
+        sampler.start()
+    except ImportError:
+        print("AMYLOID_SAMPLER=pyinstrument requested but pyinstrument is not installed.")
+
+def _finish():
+    if sampler is not None:
+        sampler.stop()
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        path = os.path.join(PROFILE_DIR, f"{RUN_NAME}_{RUN_STARTED}_sampler.html")
+        with open(path, "w") as f:
+            f.write(sampler.output_html())
+        print(f"Sampling profile saved to {path}")
+    if PROFILE_ENABLED:
+        write_report()
+
+atexit.register(_finish)
@@ -0,0 +1,229 @@
+import argparse
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from instrumentation import cache_lookup
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_FILE = ".pipeline_cache.json"
+LOG_DIR = "pipeline_logs"
+
+# Pipeline stages: each script with the files it reads and writes (relative to the working directory)
+# and the local modules whose changes should rerun it (instrumentation.py for the other scripts that import it;
+# embed and export leave their imports out, so profiler edits do not rerun or clean the embedding run).
+# A stage depends on every stage that produces one of its inputs.
+# Inputs produced by no stage (pmids.txt, metadata.csv, all_patent_file.csv) are sources; metadata.csv
+# must use the PMID as 'ID' to line up with the exported embeddings.csv.
+# Outputs marked optional depend on the script configuration (e.g. the LDA temporal mode).
+# Stages marked clean have their outputs removed before rerunning on changed inputs; code or settings
+# changes alone keep the outputs, and amyloidBERT.py checks embeddings_metadata.json before resuming.
+STAGES = [
+    {"name": "fetch", "script": "PMID_PubMed.py", "modules": ["instrumentation.py"],
+     "inputs": ["pmids.txt"], "outputs": ["abstracts.txt", "missing_abstracts.txt"]},
+    {"name": "dedup", "script": "Deduplicate_Abstracts.py",
+     "inputs": ["abstracts.txt"], "outputs": ["unique_abstracts.txt", "duplicate_clusters.csv"]},
+    {"name": "embed", "script": "amyloidBERT.py",
+     "clean": True,  # The script resumes from existing outputs
+     "inputs": ["unique_abstracts.txt"], "outputs": ["embeddings.pt", "embeddings_metadata.json"]},
+    {"name": "export", "script": "Export_Embeddings.py",
+     "inputs": ["embeddings.pt", "unique_abstracts.txt"], "outputs": ["embeddings.csv"]},
+    {"name": "country", "script": "Affiliation_Country.py", "modules": ["instrumentation.py"],
+     "inputs": ["metadata.csv"], "outputs": ["country_frequency.csv"]},
+    {"name": "chemicals", "script": "Chemicals_Compounds.py", "modules": ["instrumentation.py"],
+     "inputs": ["metadata.csv"], "outputs": ["compounds_summary.csv", "treemap.png"]},
+    {"name": "lda", "script": "LDA_temporal.py", "modules": ["topic_summary.py", "instrumentation.py"],
+     "inputs": ["metadata.csv"], "outputs": [],
+     "optional_outputs": ["topic_frequencies.csv", "temporal_topic_frequencies.csv"]},
+    {"name": "lda_patent", "script": "LDA_patent.py", "modules": ["topic_summary.py", "instrumentation.py"],
+     "inputs": ["all_patent_file.csv"], "outputs": ["patent_topic_frequencies.csv"]},
+    {"name": "embedding_topics", "script": "Embedding_Topics.py", "modules": ["topic_summary.py", "instrumentation.py"],
+     "inputs": ["embeddings.csv", "metadata.csv"],
+     "outputs": ["embedding_topics.csv", "embedding_topic_assignments.csv"]},
+    {"name": "knn", "script": "kNN_SMOTE.py",
+     "inputs": ["embeddings.csv", "metadata.csv"], "outputs": ["knn_results_optimized.csv"]},
+]
+
+# Function to hash a file, reusing the stored digest when size and mtime are unchanged
+def file_digest(path, hash_cache):
+    stat = os.stat(path)
+    cached = hash_cache.get(path)
+    hit = bool(cached) and cached[0] == stat.st_size and cached[1] == stat.st_mtime_ns
+    cache_lookup("file_digest", hit)
+    if hit:
+        return cached[2]
+
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    hash_cache[path] = [stat.st_size, stat.st_mtime_ns, digest.hexdigest()]
+    return digest.hexdigest()
+
+# Function to hash a JSON-serializable value
+def json_digest(value):
+    return hashlib.sha256(json.dumps(value, sort_keys=True).encode()).hexdigest()
+
+# Function to compute the cache keys of a stage: (key over code, inputs and parameters, key over inputs only)
+def stage_key(stage, hash_cache):
+    code = [os.path.join(SCRIPTS_DIR, name) for name in [stage["script"]] + stage.get("modules", [])]
+    inputs = {path: file_digest(path, hash_cache) for path in stage["inputs"]}
+    key = {
+        "code": {os.path.basename(path): file_digest(path, hash_cache) for path in code},
+        "inputs": inputs,
+        "params": {"python": sys.executable, "args": stage.get("args", [])},
+    }
+    return json_digest(key), json_digest(inputs)
+
+# Function to check whether a stage's recorded outputs are still present
+def outputs_present(stage, record):
+    return all(os.path.exists(path) for path in stage["outputs"] + record.get("optional_outputs", []))
+
+# Function to run one stage as a subprocess, logging its output
+def run_stage(stage):
+    os.makedirs(LOG_DIR, exist_ok=True)
+    log_path = os.path.join(LOG_DIR, f"{stage['name']}.log")
+    command = [sys.executable, os.path.join(SCRIPTS_DIR, stage["script"])] + stage.get("args", [])
+
+    start = time.time()
+    with open(log_path, 'w') as log:
+        result = subprocess.run(command, stdout=log, stderr=subprocess.STDOUT)
+    return result.returncode, time.time() - start, log_path
+
+# Function to find the producer stage of every input
+def stage_dependencies(stages):
+    producers = {path: stage["name"] for stage in stages for path in stage["outputs"] + stage.get("optional_outputs", [])}
+    return {
+        stage["name"]: {producers[path] for path in stage["inputs"] if path in producers and producers[path] != stage["name"]}
+        for stage in stages
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the amyloid pipeline, skipping stages whose inputs are unchanged.")
+    parser.add_argument("stages", nargs="*", help="Stages to run (default: all). Upstream stages are included.")
+    parser.add_argument("--workdir", default=".", help="Directory holding the pipeline files.")
+    parser.add_argument("--jobs", type=int, default=4, help="Maximum number of stages run concurrently.")
+    parser.add_argument("--force", action="store_true", help="Rerun stages even if their cache key is unchanged.")
+    parser.add_argument("--dry-run", action="store_true", help="Only report which stages would run.")
+    args = parser.parse_args()
+
+    os.chdir(args.workdir)
+    dependencies = stage_dependencies(STAGES)
+    stages = {stage["name"]: stage for stage in STAGES}
+
+    # Select the requested stages and everything upstream of them
+    unknown = set(args.stages) - set(stages)
+    if unknown:
+        parser.error(f"Unknown stages: {', '.join(sorted(unknown))}")
+    selected = set(args.stages or stages)
+    pending = list(selected)
+    while pending:
+        for upstream in dependencies[pending.pop()]:
+            if upstream not in selected:
+                selected.add(upstream)
+                pending.append(upstream)
+
+    cache = {}
+    if os.path.exists(CACHE_FILE):
+        with open(CACHE_FILE, 'r') as f:
+            cache = json.load(f)
+    hash_cache = cache.setdefault("file_hashes", {})
+    records = cache.setdefault("stages", {})
+
+    def save_cache():
+        with open(CACHE_FILE, 'w') as f:
+            json.dump(cache, f, indent=2)
+
+    # Function to decide whether a stage must run; returns (run, (key, inputs_key), reason)
+    def plan(name):
+        stage = stages[name]
+        missing = [path for path in stage["inputs"] if not os.path.exists(path)]
+        if missing:
+            return None, None, f"missing inputs: {', '.join(missing)}"
+        key, inputs_key = stage_key(stage, hash_cache)
+        record = records.get(name, {})
+        up_to_date = record.get("key") == key and not record.get("failed") and outputs_present(stage, record)
+        cache_lookup("stage", up_to_date)
+        if not args.force and up_to_date:
+            return False, (key, inputs_key), "up to date"
+        return True, (key, inputs_key), "forced" if args.force else "inputs, code or outputs changed"
+
+    done, failed = set(), set()
+    would_run = set()  # Dry run: stages reported as "would run"
+    running = {}
+    waiting = set(selected)
+
+    with ThreadPoolExecutor(max_workers=args.jobs) as executor:
+        while waiting or running:
+            # Start every stage whose upstream stages have finished
+            for name in sorted(waiting):
+                upstream = dependencies[name] & selected
+                if upstream & failed:
+                    print(f"[{name}] skipped: upstream stage failed.")
+                    waiting.discard(name)
+                    failed.add(name)
+                    continue
+                if not upstream <= done:
+                    continue
+
+                waiting.discard(name)
+                if args.dry_run and upstream & would_run:
+                    # Upstream outputs would change (or do not exist yet), so this stage would run too
+                    print(f"[{name}] would run (upstream stage would run).")
+                    would_run.add(name)
+                    done.add(name)
+                    continue
+
+                run, keys, reason = plan(name)
+                if run is None:
+                    print(f"[{name}] cannot run: {reason}.")
+                    failed.add(name)
+                elif not run or args.dry_run:
+                    print(f"[{name}] {'would run' if run else 'skipped'} ({reason}).")
+                    if run:
+                        would_run.add(name)
+                    done.add(name)
+                else:
+                    stage = stages[name]
+                    # Only new inputs invalidate the outputs of a resuming stage
+                    if stage.get("clean") and records.get(name, {}).get("inputs_key") not in (None, keys[1]):
+                        for path in stage["outputs"]:
+                            if os.path.exists(path):
+                                os.remove(path)
+                    print(f"[{name}] running ({reason})...")
+                    running[executor.submit(run_stage, stages[name])] = (name, keys)
+
+            if not running:
+                continue
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                name, (key, inputs_key) = running.pop(future)
+                returncode, elapsed, log_path = future.result()
+                if returncode != 0:
+                    print(f"[{name}] failed with exit code {returncode} after {elapsed:.1f}s (see {log_path}).")
+                    failed.add(name)
+                    # Keep the key so a rerun on the same inputs resumes instead of cleaning the outputs
+                    records[name] = {"key": key, "inputs_key": inputs_key, "failed": True}
+                    save_cache()
+                    continue
+
+                print(f"[{name}] finished in {elapsed:.1f}s.")
+                done.add(name)
+                stage = stages[name]
+                records[name] = {
+                    "key": key,
+                    "inputs_key": inputs_key,
+                    "optional_outputs": [path for path in stage.get("optional_outputs", []) if os.path.exists(path)],
+                }
+                save_cache()
+
+    print(f"Stages completed: {len(done)}; failed or skipped: {len(failed)}.")
+    if failed:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+# Function to get the top words of every topic at once
+# Returns (indices, weights), each of shape (n_topics, num_words), sorted by descending weight.
+# Weights are the topic-word distribution (each component row normalized to sum to 1).
+# Sparse components are handled row by row on their stored entries and return lists of arrays instead.
+def top_words(components, num_words):
+    if sparse.issparse(components):
+        return sparse_top_words(sparse.csr_matrix(components), num_words)
+
+    components = np.asarray(components)
+    k = min(num_words, components.shape[1])
+
+    # argpartition selects the k largest per row without sorting the whole vocabulary
+    top = np.argpartition(components, -k, axis=1)[:, -k:]
+    weights = np.take_along_axis(components, top, axis=1)
+
+    # Only the k selected entries are sorted
+    order = np.argsort(-weights, axis=1)
+    top = np.take_along_axis(top, order, axis=1)
+    weights = np.take_along_axis(weights, order, axis=1)
+
+    row_sums = components.sum(axis=1, keepdims=True)
+    weights = weights / np.where(row_sums > 0, row_sums, 1)
+    return top, weights
+
+# Function to get the top words of a CSR matrix without densifying it
+# Rows with fewer than num_words stored entries return fewer words.
+def sparse_top_words(components, num_words):
+    row_sums = np.asarray(components.sum(axis=1)).ravel()
+    tops, weights = [], []
+    for i in range(components.shape[0]):
+        start, end = components.indptr[i], components.indptr[i + 1]
+        data = components.data[start:end]
+        k = min(num_words, data.size)
+        selected = np.argpartition(data, -k)[-k:] if k < data.size else np.arange(data.size)
+        selected = selected[np.argsort(-data[selected])]
+        tops.append(components.indices[start:end][selected])
+        weights.append(data[selected] / (row_sums[i] if row_sums[i] > 0 else 1))
+    return tops, weights
+
+# Function to build the topic summary table (Topic, Frequency, Top_Words, Top_Weights) in one shot
+def summarize_topics(components, feature_names, frequencies, num_words, topic_labels=None,
+                     topic_column='Topic', frequency_column='Frequency'):
+    top, weights = top_words(components, num_words)
+    feature_names = np.asarray(feature_names)
+    if isinstance(top, np.ndarray):
+        words = feature_names[top]  # Single fancy-index lookup for all topics
+    else:
+        words = [feature_names[row] for row in top]
+
+    if topic_labels is None:
+        topic_labels = [f'Topic {i + 1}' for i in range(len(top))]
+
+    return pd.DataFrame({
+        topic_column: topic_labels,
+        frequency_column: frequencies,
+        'Top_Words': [', '.join(row) for row in words],
+        'Top_Weights': [', '.join(f'{w:.4f}' for w in row) for row in weights]
+    })